@@ -3,7 +3,7 @@ from lianke_printing.base import LiankePrintingBase
 
 class LiankePrinting(LiankePrintingBase):
     def device_info(self):
-        return self.get("/device/device_info", params={"deviceId": self.device_id, "deviceKey": self.device_key})
+        return self.get("/device/device_info", params=self._auth_params)
 
     def printer_enum(self):
         return self.get("/print/printer_enum")
@@ -16,7 +16,7 @@ class LiankePrinting(LiankePrintingBase):
         """
         return self.get(
             "/external_api/printer_list",
-            params={"deviceId": self.device_id, "deviceKey": self.device_key, "printerType": printer_type},
+            params={**self._auth_params, "printerType": printer_type},
         )
 
     def printer_params(self, printer_hash: str):
@@ -27,11 +27,7 @@ class LiankePrinting(LiankePrintingBase):
         """
         return self.get(
             "/print/printer_params",
-            params={
-                "deviceId": self.device_id,
-                "deviceKey": self.device_key,
-                "printerHash": printer_hash,
-            },
+            params={**self._auth_params, "printerHash": printer_hash},
         )
 
     def add_job(self, job_files: list, printer_hash: str, paper_size: int = 9, timeout: int = 20, **kwargs):
@@ -43,13 +39,7 @@ class LiankePrinting(LiankePrintingBase):
         :param timeout: 发送超时时间
         :return:
         """
-        post_data = {
-            "deviceId": self.device_id,
-            "deviceKey": self.device_key,
-            "printerHash": printer_hash,
-            "dmPaperSize": paper_size,
-        }
-        post_data.update(kwargs)
+        post_data = {**self._auth_params, "printerHash": printer_hash, "dmPaperSize": paper_size, **kwargs}
         return self.post("/print/job", data=post_data, files=job_files, timeout=timeout)
 
     def job_result(self, task_id: str):
@@ -61,11 +51,7 @@ class LiankePrinting(LiankePrintingBase):
         """
         return self.get(
             "/print/job",
-            params={
-                "deviceId": self.device_id,
-                "deviceKey": self.device_key,
-                "task_id": task_id,
-            },
+            params={**self._auth_params, "task_id": task_id},
         )
 
     def cancel_job(self, task_id: str):
@@ -76,11 +62,7 @@ class LiankePrinting(LiankePrintingBase):
         """
         return self.delete(
             "/print/job",
-            params={
-                "deviceId": self.device_id,
-                "deviceKey": self.device_key,
-                "task_id": task_id,
-            },
+            params={**self._auth_params, "task_id": task_id},
         )
 
     def printer_status(self, printer_hash: str):
@@ -91,5 +73,5 @@ class LiankePrinting(LiankePrintingBase):
         """
         return self.get(
             "/device/printer_status",
-            params={"deviceId": self.device_id, "deviceKey": self.device_key, "printerHash": printer_hash},
+            params={**self._auth_params, "printerHash": printer_hash},
         )
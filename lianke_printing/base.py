@@ -1,15 +1,51 @@
+from types import MappingProxyType
+
 import requests
+from requests.adapters import HTTPAdapter
 from lianke_printing.exceptions import LiankePrintingException
 
+# 所有客户端共享的连接池，不同设备的请求复用到API服务器的连接
+_HTTP_ADAPTER = HTTPAdapter(pool_maxsize=32)
+
+
+class _SharedPoolSession(requests.Session):
+    """挂载共享连接池的会话，关闭会话时不关闭共享连接池"""
+
+    def __init__(self):
+        super().__init__()
+        self.mount("http://", _HTTP_ADAPTER)
+        self.mount("https://", _HTTP_ADAPTER)
+
+    def close(self):
+        for adapter in self.adapters.values():
+            if adapter is not _HTTP_ADAPTER:
+                adapter.close()
+
 
 class LiankePrintingBase:
     API_BASE_URL = "https://cloud.liankenet.com/api"
 
     def __init__(self, api_key: str, device_id: str, device_key: str):
-        self._http = requests.Session()
+        self._http = _SharedPoolSession()
         self.api_key = api_key
         self.device_id = device_id
         self.device_key = device_key
+        # 每个请求都需要携带的设备认证参数
+        self._auth_params = MappingProxyType({"deviceId": device_id, "deviceKey": device_key})
+
+    @classmethod
+    def warm_up(cls, timeout: int = 5):
+        """
+        预先建立到API服务器的连接（DNS解析和TLS握手），供后续请求复用
+        :param timeout: 超时时间
+        :return: 是否成功
+        """
+        try:
+            with _SharedPoolSession() as http:
+                http.head(cls.API_BASE_URL, timeout=timeout)
+        except Exception:
+            return False
+        return True
 
     def _request(self, method, url_or_endpoint, **kwargs):
         if not url_or_endpoint.startswith(("http://", "https://")):
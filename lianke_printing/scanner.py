@@ -9,7 +9,7 @@ class LiankeScanning(LiankePrintingBase):
         """
         return self.get(
             "/scanning/scanner_list",
-            params={"deviceId": self.device_id, "deviceKey": self.device_key},
+            params=self._auth_params,
         )
 
     def scanner_status(self, scanning_id: str):
@@ -20,7 +20,7 @@ class LiankeScanning(LiankePrintingBase):
         """
         return self.get(
             "/scanning/scanner_status",
-            params={"deviceId": self.device_id, "deviceKey": self.device_key, "scanningId": scanning_id},
+            params={**self._auth_params, "scanningId": scanning_id},
         )
 
     def scanner_params(self, scanning_id: str):
@@ -31,7 +31,7 @@ class LiankeScanning(LiankePrintingBase):
         """
         return self.get(
             "/scanning/scanner_params",
-            params={"deviceId": self.device_id, "deviceKey": self.device_key, "scanningId": scanning_id},
+            params={**self._auth_params, "scanningId": scanning_id},
         )
 
     def create_scan_job(self, scanning_id: str, **kwargs):
@@ -41,12 +41,7 @@ class LiankeScanning(LiankePrintingBase):
         :param kwargs: 其他扫描参数
         :return:
         """
-        post_data = {
-            "deviceId": self.device_id,
-            "deviceKey": self.device_key,
-            "scanningId": scanning_id,
-        }
-        post_data.update(kwargs)
+        post_data = {**self._auth_params, "scanningId": scanning_id, **kwargs}
         return self.post("/scanning/job", json=post_data)
 
     def query_scan_job(self, task_id: str):
@@ -57,7 +52,7 @@ class LiankeScanning(LiankePrintingBase):
         """
         return self.get(
             "/scanning/job",
-            params={"deviceId": self.device_id, "deviceKey": self.device_key, "task_id": task_id},
+            params={**self._auth_params, "task_id": task_id},
         )
 
     def delete_scan_job(self, task_id: str):
@@ -68,6 +63,6 @@ class LiankeScanning(LiankePrintingBase):
         """
         return self.delete(
             "/scanning/job",
-            json={"deviceId": self.device_id, "deviceKey": self.device_key, "task_id": task_id},
+            json={**self._auth_params, "task_id": task_id},
         )
 
@@ -21,33 +21,220 @@
 使用方法:
     uv run main.py
 """
-import io
+import asyncio
+import functools
 import logging
 import os
 import json
+import re
 import mimetypes
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from urllib.parse import unquote, urlparse
 from typing import Dict, Any, List, Optional, Union, AsyncIterator
 from dataclasses import dataclass
 
+import httpx
 from mcp import ServerSession
 from mcp.server.fastmcp import FastMCP, Context
 from pydantic import Field
 
 from lianke_printing import LiankePrinting
+from lianke_printing.base import LiankePrintingBase
 from lianke_printing.scanner import LiankeScanning
 from lianke_printing.exceptions import LiankePrintingException
 
+# 优先使用 orjson 解析JSON，未安装时回退到标准库
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 固定的错误响应
+_ERR_NO_APIKEY = {"code": 400, "msg": "请求头中缺少 ApiKey"}
+_ERR_PRINTER_NOT_CONNECTED = {"code": 404, "msg": "打印未连接"}
+
+# 根据文件扩展名设置默认MIME类型
+mimetypes.init()
+_MIMETYPE_MAP = {
+    '.pdf': 'application/pdf',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.ppt': 'application/vnd.ms-powerpoint',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.txt': 'text/plain'
+}
+
+# 解析 key=value,key2=value2 形式的kwargs参数
+_KV_RE = re.compile(r"\s*([^=,\s][^=,]*?)\s*=\s*([^,]*?)\s*(?:,|$)")
+
+# 下载打印文件共用的异步HTTP客户端，复用连接池避免每次任务重复DNS解析和TLS握手
+_ASYNC = httpx.AsyncClient(
+    transport=httpx.AsyncHTTPTransport(
+        retries=2,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    ),
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    follow_redirects=True,
+)
+# 下载遇到网关错误时的重试次数、退避时间和状态码
+_DOWNLOAD_RETRIES = 2
+_DOWNLOAD_BACKOFF = 0.2
+_DOWNLOAD_RETRY_STATUS = {502, 503, 504}
+
+
+# 执行链科SDK阻塞调用的共享线程池，限制并发线程数
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="lianke")
+# 每台设备同时提交的打印任务数上限，避免压垮打印盒
+_DEVICE_SUBMIT_LIMIT = 4
+# 设备 -> [信号量, 使用中的提交数]
+_device_slots: Dict[tuple, list] = {}
+
+
+async def run_blocking(func, *args, **kwargs):
+    """在共享线程池中执行阻塞调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+def _release_device_slot(key: tuple, slot: list, future: asyncio.Future):
+    """提交线程结束后归还名额，设备没有进行中的提交时移除其信号量"""
+    slot[0].release()
+    slot[1] -= 1
+    if not slot[1] and _device_slots.get(key) is slot:
+        del _device_slots[key]
+    if not future.cancelled():
+        # 调用方已取消时由这里取走异常，避免未获取异常的警告
+        future.exception()
+
+
+async def submit_job(client: LiankePrinting, func, *args, **kwargs):
+    """
+    在设备并发上限内执行打印任务提交
+    名额在线程中的提交真正结束后才归还，调用方取消不会让同一设备超过上限
+    """
+    key = (client.api_key, client.device_id)
+    slot = _device_slots.get(key)
+    if slot is None:
+        slot = _device_slots[key] = [asyncio.Semaphore(_DEVICE_SUBMIT_LIMIT), 0]
+    slot[1] += 1
+    try:
+        await slot[0].acquire()
+    except BaseException:
+        slot[1] -= 1
+        if not slot[1] and _device_slots.get(key) is slot:
+            del _device_slots[key]
+        raise
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_EXECUTOR, functools.partial(func, *args, **kwargs))
+    future.add_done_callback(functools.partial(_release_device_slot, key, slot))
+    return await asyncio.shield(future)
+
+
+# 打印文件缓存: url -> (文件内容, ETag, Last-Modified)，按总字节数做LRU淘汰
+# 重复提交同一URL时使用条件请求，服务端返回304则直接复用缓存内容
+# 超过单个文件上限的文件不缓存
+_URL_CACHE_MAX_BYTES = 128 * 1024 * 1024
+_URL_CACHE_MAX_ENTRY_BYTES = 16 * 1024 * 1024
+_url_cache: "OrderedDict[str, tuple[bytes, Optional[str], Optional[str]]]" = OrderedDict()
+_url_cache_bytes = 0
+
+
+def _uncache_file(url: str):
+    """删除打印文件缓存"""
+    global _url_cache_bytes
+    old = _url_cache.pop(url, None)
+    if old:
+        _url_cache_bytes -= len(old[0])
+
+
+def _cache_file(url: str, content: bytes, etag: Optional[str], last_modified: Optional[str]):
+    """写入打印文件缓存，超出容量时淘汰最久未使用的文件"""
+    global _url_cache_bytes
+    _uncache_file(url)
+    if not (etag or last_modified) or len(content) > _URL_CACHE_MAX_ENTRY_BYTES:
+        return
+
+    _url_cache[url] = (content, etag, last_modified)
+    _url_cache_bytes += len(content)
+    while _url_cache_bytes > _URL_CACHE_MAX_BYTES:
+        _, (evicted, _, _) = _url_cache.popitem(last=False)
+        _url_cache_bytes -= len(evicted)
+
+
+async def _download_file(url: str) -> bytes:
+    """
+    下载打印文件，已缓存的文件使用 If-None-Match/If-Modified-Since 条件请求
+    下载内容直接用于上传，不再复制到其他缓冲区
+    """
+    headers = {}
+    cached = _url_cache.get(url)
+    if cached:
+        _, etag, last_modified = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    for attempt in range(_DOWNLOAD_RETRIES + 1):
+        response = await _ASYNC.get(url, headers=headers)
+        if response.status_code in _DOWNLOAD_RETRY_STATUS and attempt < _DOWNLOAD_RETRIES:
+            await asyncio.sleep(_DOWNLOAD_BACKOFF * 2 ** attempt)
+            continue
+        if cached and response.status_code == 304:
+            # 请求期间缓存可能已被淘汰，重新写入而不是直接调整顺序
+            _cache_file(url, *cached)
+            return cached[0]
+
+        response.raise_for_status()
+        content = response.content
+        _cache_file(url, content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return content
+
+
+def _add_job_from_path(client: LiankePrinting, file_path: str, filename: str, mimetype: str,
+                       printer_hash: str, **job_params):
+    """在线程中打开本地文件并提交打印任务，文件在上传结束后关闭"""
+    try:
+        job_file = open(file_path, 'rb')
+    except OSError as e:
+        return {"code": 400, "msg": f"读取文件失败: {str(e)}"}
+    with job_file:
+        return client.add_job([("jobFile", (filename, job_file, mimetype))], printer_hash, **job_params)
+
+
+@functools.lru_cache(maxsize=256)
+def _get_lianke_client(api_key: str, device_id: str, device_key: str) -> LiankePrinting:
+    """按设备缓存 LiankePrinting 客户端，复用其HTTP连接池"""
+    return LiankePrinting(api_key, device_id, device_key)
+
+
+@functools.lru_cache(maxsize=256)
+def _get_scanning_client(api_key: str, device_id: str, device_key: str) -> LiankeScanning:
+    """按设备缓存 LiankeScanning 客户端，复用其HTTP连接池"""
+    return LiankeScanning(api_key, device_id, device_key)
+
+
 def create_lianke_client(api_key: str, device_id: str, device_key: str) -> LiankePrinting:
     """创建 LiankePrinting 客户端实例"""
     if not api_key or not device_id or not device_key:
         raise ValueError("API密钥、设备ID和设备密钥不能为空")
     
-    return LiankePrinting(api_key, device_id, device_key)
+    return _get_lianke_client(api_key, device_id, device_key)
 
 
 def create_scanning_client(api_key: str, device_id: str, device_key: str) -> LiankeScanning:
@@ -55,36 +242,93 @@ def create_scanning_client(api_key: str, device_id: str, device_key: str) -> Lia
     if not api_key or not device_id or not device_key:
         raise ValueError("API密钥、设备ID和设备密钥不能为空")
     
-    return LiankeScanning(api_key, device_id, device_key)
+    return _get_scanning_client(api_key, device_id, device_key)
+
+
+@dataclass(slots=True)
+class Auth:
+    """请求认证信息"""
+    api_key: str
+    device_id: Optional[str]
+    device_key: Optional[str]
+
+
+def _extract_auth(ctx: Context, device_id: Optional[str], device_key: Optional[str]) -> Union[Auth, Dict[str, Any]]:
+    """从请求头获取认证信息，缺少 ApiKey 时返回错误响应"""
+    headers = ctx.request_context.request.headers
+    api_key = headers.get("ApiKey")
+    if not api_key:
+        return _ERR_NO_APIKEY
+    return Auth(api_key, headers.get("DeviceId") or device_id, headers.get("DeviceKey") or device_key)
+
+
+def _build_job_params(
+    dm_paper_size: str,
+    jp_scale: str,
+    dm_orientation: str,
+    dm_copies: str,
+    dm_color: str,
+    kwargs: str,
+) -> Dict[str, Any]:
+    """构建打印任务参数"""
+    job_params = {
+        "dmPaperSize": int(dm_paper_size),
+        "jpScale": jp_scale,
+        "dmOrientation": int(dm_orientation),
+        "dmCopies": int(dm_copies),
+        "dmColor": int(dm_color),
+    }
+
+    # 添加额外参数（如果提供了kwargs）
+    if kwargs:
+        try:
+            extra_params = json_loads(kwargs)
+            job_params.update(extra_params)
+        except json.JSONDecodeError:
+            logger.warning(f"无法解析kwargs参数: {kwargs}")
+            # 如果不是JSON格式，尝试作为简单的键值对处理
+            if "=" in kwargs:
+                job_params.update((m.group(1), m.group(2)) for m in _KV_RE.finditer(kwargs))
+    return job_params
+
+
+_warmed_up = False
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """首个会话建立时在后台预热到链科API服务器的连接"""
+    global _warmed_up
+    if not _warmed_up:
+        _warmed_up = True
+        asyncio.get_running_loop().run_in_executor(_EXECUTOR, LiankePrintingBase.warm_up)
+    yield
 
 
 # 创建MCP服务器
 mcp = FastMCP("LiankePrintBox",
-              website_url="https://www.liankenet.com")
+              website_url="https://www.liankenet.com",
+              lifespan=lifespan)
 
 
 @mcp.tool()
-def get_device_info(
+async def get_device_info(
     ctx: Context,
     device_id: Optional[str] = None, 
     device_key: Optional[str] = None,
 ) -> Dict[str, Any]:
     """获取设备信息"""
-    headers = ctx.request_context.request.headers
-    api_key = headers.get("ApiKey")
-    device_id = headers.get("DeviceId") or device_id
-    device_key = headers.get("DeviceKey") or device_key
-    
-    if not api_key:
-        return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+    auth = _extract_auth(ctx, device_id, device_key)
+    if isinstance(auth, dict):
+        return auth
         
-    client = create_lianke_client(api_key, device_id, device_key)
-    result = client.device_info()
+    client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
+    result = await run_blocking(client.device_info)
     return result
 
 
 @mcp.tool()
-def get_printer_list(
+async def get_printer_list(
     ctx: Context,
     device_id: Optional[str] = None, 
     device_key: Optional[str] = None, 
@@ -101,23 +345,17 @@ def get_printer_list(
     Returns:
         打印机列表信息，包含打印机型号、端口、状态等
     """
-    headers = ctx.request_context.request.headers
-    print("ApiKey", headers.get("ApiKey"))
-
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 获取打印机列表
-        result = client.printer_list(printer_type)
+        result = await run_blocking(client.printer_list, printer_type)
         printers = result.get("data", {}).get("row", [])
         
         return {
@@ -137,24 +375,90 @@ def get_printer_list(
         return {"code": 503, "msg": f"获取打印机列表失败: {str(e)}"}
 
 
-def get_default_printer(api_key: str, device_id: str, device_key: str):
-    """获取默认打印机"""
+# 接口结果缓存: key -> (获取时间, 过期时间, 结果)
+# 未超过ttl时直接返回；超过ttl但未超过stale时先返回旧值，并在后台刷新；超过stale的缓存被删除
+# 同一key同时只有一个加载任务，并发请求共用其结果
+_swr_cache: Dict[tuple, tuple[float, float, Any]] = {}
+_swr_loading: Dict[tuple, asyncio.Task] = {}
+
+
+def _swr_evict(now: float):
+    """删除超过stale的缓存"""
+    for key in [key for key, (_, expires_at, _) in _swr_cache.items() if expires_at <= now]:
+        del _swr_cache[key]
+
+
+async def _swr_load(key: tuple, stale: float, loader):
+    """调用接口获取结果，非空结果写入缓存"""
+    value = await run_blocking(loader)
+    now = time.monotonic()
+    _swr_evict(now)
+    if value is not None:
+        _swr_cache[key] = (now, now + stale, value)
+    return value
+
+
+def _swr_loaded(key: tuple, background: bool, task: asyncio.Task):
+    """加载任务结束后移除，后台刷新失败时记录原因，前台加载的异常由调用方处理"""
+    _swr_loading.pop(key, None)
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error and background:
+        logger.warning(f"更新缓存失败: {error}")
+
+
+def _swr_start(key: tuple, stale: float, loader, background: bool = False) -> asyncio.Task:
+    """启动加载任务，已有进行中的任务时直接复用"""
+    task = _swr_loading.get(key)
+    if task is None:
+        task = _swr_loading[key] = asyncio.create_task(_swr_load(key, stale, loader))
+        task.add_done_callback(functools.partial(_swr_loaded, key, background))
+    return task
+
+
+async def _swr_get(key: tuple, ttl: float, stale: float, loader):
+    """按 stale-while-revalidate 策略读取缓存"""
+    cached = _swr_cache.get(key)
+    if cached:
+        fetched_at, expires_at, value = cached
+        now = time.monotonic()
+        if now - fetched_at < ttl:
+            return value
+        if now < expires_at:
+            _swr_start(key, stale, loader, background=True)
+            return value
+    # 等待共用的加载任务，单个调用方取消时不影响其他调用方
+    return await asyncio.shield(_swr_start(key, stale, loader))
+
+
+def _fetch_default_printer(api_key: str, device_id: str, device_key: str, printer_type: int = 1):
+    """从接口获取默认打印机"""
+    client = create_lianke_client(api_key, device_id, device_key)
+    result = client.printer_list(printer_type)
+    printers = result.get("data", {}).get("row", [])
+    if not printers:
+        return None
+    # 默认取第一个
+    return printers[0]["hash_id"]
+
+
+async def get_default_printer(api_key: str, device_id: str, device_key: str, printer_type: int = 1):
+    """获取默认打印机（默认USB打印机）"""
     try:
-        client = create_lianke_client(api_key, device_id, device_key)
-        result = client.printer_list(1)  # USB打印机
-        printers = result.get("data", {}).get("row", [])
-        if not printers:
-            return None
-        # 默认取第一个
-        printer_hash = printers[0]["hash_id"]
-        return printer_hash
+        return await _swr_get(
+            ("default_printer", api_key, device_id, device_key, printer_type),
+            60,
+            600,
+            functools.partial(_fetch_default_printer, api_key, device_id, device_key, printer_type),
+        )
     except Exception as e:
         logger.error(f"获取默认打印机失败: {e}")
         return None
 
 
 @mcp.tool()
-def get_printer_params(
+async def get_printer_params(
     ctx: Context,
     printer_hash: str, 
     device_id: Optional[str] = None, 
@@ -171,22 +475,22 @@ def get_printer_params(
     Returns:
         打印机参数配置，包含纸张尺寸、颜色、双面打印等选项
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 获取打印机参数
-        result = client.printer_params(printer_hash)
+        result = await _swr_get(
+            ("printer_params", auth.api_key, auth.device_id, auth.device_key, printer_hash),
+            300,
+            3600,
+            functools.partial(client.printer_params, printer_hash),
+        )
         return {
             "code": 200,
             "msg": "success",
@@ -202,7 +506,7 @@ def get_printer_params(
 
 
 @mcp.tool()
-def submit_print_job(
+async def submit_print_job(
     ctx: Context,
     job_file_url: str,
     kwargs: str,
@@ -233,73 +537,44 @@ def submit_print_job(
     Returns:
         任务提交结果，包含task_id用于后续查询
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
 
         if not printerHash:
-            printerHash = get_default_printer(api_key, device_id, device_key)
+            printerHash = await get_default_printer(auth.api_key, auth.device_id, auth.device_key)
             if not printerHash:
-                return {"code": 404, "msg": "打印未连接"}
+                return _ERR_PRINTER_NOT_CONNECTED
 
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 构建打印任务参数
-        job_params = {
-            "dmPaperSize": int(dm_paper_size),
-            "jpScale": jp_scale,
-            "dmOrientation": int(dm_orientation),
-            "dmCopies": int(dm_copies),
-            "dmColor": int(dm_color),
-        }
-        
-        # 添加额外参数（如果提供了kwargs）
-        if kwargs:
-            try:
-                extra_params = json.loads(kwargs)
-                job_params.update(extra_params)
-            except json.JSONDecodeError:
-                logger.warning(f"无法解析kwargs参数: {kwargs}")
-                # 如果不是JSON格式，尝试作为简单的键值对处理
-                if "=" in kwargs:
-                    pairs = kwargs.split(",")
-                    for pair in pairs:
-                        if "=" in pair:
-                            key, value = pair.split("=", 1)
-                            job_params[key.strip()] = value.strip()
+        job_params = _build_job_params(dm_paper_size, jp_scale, dm_orientation, dm_copies, dm_color, kwargs)
         
         # 准备文件数据
-        import requests
         try:
-            file_response = requests.get(job_file_url, timeout=30)
-            file_response.raise_for_status()
-            file_content = file_response.content
-            filename = job_file_url.split('/')[-1] or 'document.pdf'
-            
-            # 获取文件MIME类型
-            mimetype, _ = mimetypes.guess_type(job_file_url)
-            if not mimetype:
-                mimetype = 'application/octet-stream'
-            
-            # 准备文件上传
-            job_files = [("jobFile", (filename, io.BytesIO(file_content), mimetype))]
-            
-            # 提交打印任务
-            result = client.add_job(job_files, printerHash, **job_params)
-            return result
-            
-        except requests.RequestException as e:
+            file_content = await _download_file(job_file_url)
+        except httpx.HTTPError as e:
             logger.error(f"下载文件失败: {e}")
             return {"code": 400, "msg": f"下载文件失败: {str(e)}"}
-        
+
+        # 文件名和MIME类型只取URL路径部分，忽略查询参数
+        path = unquote(urlparse(job_file_url).path)
+        filename = path.rsplit('/', 1)[-1] or 'document.pdf'
+
+        # 获取文件MIME类型
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        # 准备文件上传，直接使用下载内容
+        job_files = [("jobFile", (filename, file_content, mimetype))]
+
+        # 提交打印任务
+        result = await submit_job(client, client.add_job, job_files, printerHash, **job_params)
+        return result
+
     except LiankePrintingException as e:
         return {"code": e.code or 503, "msg": e.msg}
     except ValueError as e:
@@ -310,7 +585,7 @@ def submit_print_job(
 
 
 @mcp.tool()
-def submit_print_job_with_file(
+async def submit_print_job_with_file(
     ctx: Context,
     file_path: str = Field(description="本地文件路径（支持相对或绝对路径）"),
     printer_hash: Optional[str] = Field(description="打印机ID", default=None),
@@ -341,89 +616,35 @@ def submit_print_job_with_file(
     Returns:
         任务提交结果，包含task_id用于后续查询
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
 
         if not printer_hash:
-            printer_hash = get_default_printer(api_key, device_id, device_key)
+            printer_hash = await get_default_printer(auth.api_key, auth.device_id, auth.device_key)
             if not printer_hash:
-                return {"code": 404, "msg": "打印未连接"}
+                return _ERR_PRINTER_NOT_CONNECTED
 
         # 检查文件是否存在
         if not os.path.exists(file_path):
             return {"code": 400, "msg": f"文件不存在: {file_path}"}
 
-        # 读取文件内容
-        try:
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-        except Exception as e:
-            return {"code": 400, "msg": f"读取文件失败: {str(e)}"}
-
         # 获取文件信息
         filename = os.path.basename(file_path)
-        mimetype, _ = mimetypes.guess_type(file_path)
-        if not mimetype:
-            # 根据文件扩展名设置默认MIME类型
-            ext = os.path.splitext(filename)[1].lower()
-            mimetype_map = {
-                '.pdf': 'application/pdf',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.bmp': 'image/bmp',
-                '.doc': 'application/msword',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                '.xls': 'application/vnd.ms-excel',
-                '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                '.ppt': 'application/vnd.ms-powerpoint',
-                '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-                '.txt': 'text/plain'
-            }
-            mimetype = mimetype_map.get(ext, 'application/octet-stream')
+        mimetype = mimetypes.guess_type(file_path)[0] or _MIMETYPE_MAP.get(
+            os.path.splitext(filename)[1].lower(), 'application/octet-stream'
+        )
 
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
-        
-        # 准备文件上传
-        job_files = [("jobFile", (filename, io.BytesIO(file_content), mimetype))]
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
 
         # 构建打印任务参数
-        job_params = {
-            "dmPaperSize": int(dm_paper_size),
-            "jpScale": jp_scale,
-            "dmOrientation": int(dm_orientation),
-            "dmCopies": int(dm_copies),
-            "dmColor": int(dm_color),
-        }
-        
-        # 添加额外参数（如果提供了kwargs）
-        if kwargs:
-            import json
-            try:
-                extra_params = json.loads(kwargs)
-                job_params.update(extra_params)
-            except json.JSONDecodeError:
-                logger.warning(f"无法解析kwargs参数: {kwargs}")
-                # 如果不是JSON格式，尝试作为简单的键值对处理
-                if "=" in kwargs:
-                    pairs = kwargs.split(",")
-                    for pair in pairs:
-                        if "=" in pair:
-                            key, value = pair.split("=", 1)
-                            job_params[key.strip()] = value.strip()
-        
-        # 提交打印任务
-        result = client.add_job(job_files, printer_hash, **job_params)
+        job_params = _build_job_params(dm_paper_size, jp_scale, dm_orientation, dm_copies, dm_color, kwargs)
+
+        # 提交打印任务，文件在执行上传的线程中打开和关闭，调用方取消时不影响正在进行的上传
+        result = await submit_job(client, _add_job_from_path, client, file_path, filename, mimetype, printer_hash, **job_params)
         return result
         
     except LiankePrintingException as e:
@@ -436,7 +657,7 @@ def submit_print_job_with_file(
 
 
 @mcp.tool()
-def get_job_status(
+async def get_job_status(
     ctx: Context,
     task_id: str,
     device_id: Optional[str] = None,
@@ -454,22 +675,17 @@ def get_job_status(
     Returns:
         任务状态信息，包含任务状态、打印结果等
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 查询任务状态
-        result = client.job_result(task_id)
+        result = await run_blocking(client.job_result, task_id)
         return result
         
     except LiankePrintingException as e:
@@ -482,7 +698,7 @@ def get_job_status(
 
 
 @mcp.tool()
-def cancel_print_job(
+async def cancel_print_job(
     ctx: Context,
     task_id: str,
     device_id: Optional[str] = None,
@@ -499,22 +715,17 @@ def cancel_print_job(
     Returns:
         取消结果
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 取消任务
-        result = client.cancel_job(task_id)
+        result = await run_blocking(client.cancel_job, task_id)
         return result
         
     except LiankePrintingException as e:
@@ -527,7 +738,7 @@ def cancel_print_job(
 
 
 @mcp.tool()
-def get_printer_status(
+async def get_printer_status(
     ctx: Context,
     printer_hash: str, 
     device_id: Optional[str] = None, 
@@ -544,22 +755,22 @@ def get_printer_status(
     Returns:
         打印机状态信息，包含缺纸、卡纸、盖子状态等
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_lianke_client(api_key, device_id, device_key)
+        client = create_lianke_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 获取打印机状态
-        result = client.printer_status(printer_hash)
+        result = await _swr_get(
+            ("printer_status", auth.api_key, auth.device_id, auth.device_key, printer_hash),
+            2,
+            5,
+            functools.partial(client.printer_status, printer_hash),
+        )
         if result is None:
             return {"code": 503, "msg": "获取打印机状态失败"}
         return result
@@ -576,7 +787,7 @@ def get_printer_status(
 # ==================== 扫描相关工具 ====================
 
 @mcp.tool()
-def get_scanner_list(
+async def get_scanner_list(
     ctx: Context,
     device_id: Optional[str] = None,
     device_key: Optional[str] = None
@@ -591,22 +802,17 @@ def get_scanner_list(
     Returns:
         扫描仪列表信息，包含扫描仪型号、端口、状态等
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_scanning_client(api_key, device_id, device_key)
+        client = create_scanning_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 获取扫描仪列表
-        result = client.scanner_list()
+        result = await run_blocking(client.scanner_list)
         scanners = result.get("data", {}).get("row", [])
         
         return {
@@ -627,7 +833,7 @@ def get_scanner_list(
 
 
 @mcp.tool()
-def get_scanner_status(
+async def get_scanner_status(
     ctx: Context,
     scanning_id: int,
     device_id: Optional[str] = None,
@@ -644,22 +850,17 @@ def get_scanner_status(
     Returns:
         扫描仪状态信息
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_scanning_client(api_key, device_id, device_key)
+        client = create_scanning_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 获取扫描仪状态
-        result = client.scanner_status(scanning_id)
+        result = await run_blocking(client.scanner_status, scanning_id)
         return {
             "code": 200,
             "msg": "success",
@@ -675,7 +876,7 @@ def get_scanner_status(
 
 
 @mcp.tool()
-def get_scanner_params(
+async def get_scanner_params(
     ctx: Context,
     scanning_id: int,
     device_id: Optional[str] = None,
@@ -692,22 +893,17 @@ def get_scanner_params(
     Returns:
         扫描仪参数配置，包含分辨率、颜色模式、文档格式等选项
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_scanning_client(api_key, device_id, device_key)
+        client = create_scanning_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 获取扫描仪参数
-        result = client.scanner_params(scanning_id)
+        result = await run_blocking(client.scanner_params, scanning_id)
         return {
             "code": 200,
             "msg": "success",
@@ -723,7 +919,7 @@ def get_scanner_params(
 
 
 @mcp.tool()
-def create_scan_job(
+async def create_scan_job(
     ctx: Context,
     scanning_id: int,
     color_mode,
@@ -750,19 +946,14 @@ def create_scan_job(
     Returns:
         任务创建结果，包含task_id用于后续查询
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_scanning_client(api_key, device_id, device_key)
+        client = create_scanning_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 构建扫描参数
         scan_params = {
@@ -777,7 +968,7 @@ def create_scan_job(
             scan_params["size"] = size
         
         # 创建扫描任务
-        result = client.create_scan_job(scanning_id, **scan_params)
+        result = await run_blocking(client.create_scan_job, scanning_id, **scan_params)
         return result
         
     except LiankePrintingException as e:
@@ -790,7 +981,7 @@ def create_scan_job(
 
 
 @mcp.tool()
-def get_scan_job_status(
+async def get_scan_job_status(
     ctx: Context,
     task_id: str,
     device_id: Optional[str] = None,
@@ -807,22 +998,17 @@ def get_scan_job_status(
     Returns:
         任务状态信息，包含任务状态、扫描结果等
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_scanning_client(api_key, device_id, device_key)
+        client = create_scanning_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 查询任务状态
-        result = client.query_scan_job(task_id)
+        result = await run_blocking(client.query_scan_job, task_id)
         return result
         
     except LiankePrintingException as e:
@@ -835,7 +1021,7 @@ def get_scan_job_status(
 
 
 @mcp.tool()
-def delete_scan_job(
+async def delete_scan_job(
     ctx: Context,
     task_id: str,
     device_id: Optional[str] = None,
@@ -852,22 +1038,17 @@ def delete_scan_job(
     Returns:
         删除结果
     """
-    headers = ctx.request_context.request.headers
-    
     try:
         # 从请求头获取配置信息
-        api_key = headers.get("ApiKey")
-        device_id = headers.get("DeviceId") or device_id
-        device_key = headers.get("DeviceKey") or device_key
-        
-        if not api_key:
-            return {"code": 400, "msg": "请求头中缺少 ApiKey"}
+        auth = _extract_auth(ctx, device_id, device_key)
+        if isinstance(auth, dict):
+            return auth
         
         # 创建客户端
-        client = create_scanning_client(api_key, device_id, device_key)
+        client = create_scanning_client(auth.api_key, auth.device_id, auth.device_key)
         
         # 删除任务
-        result = client.delete_scan_job(task_id)
+        result = await run_blocking(client.delete_scan_job, task_id)
         return result
         
     except LiankePrintingException as e: